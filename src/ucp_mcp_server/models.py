@@ -2,7 +2,16 @@
 
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+
+class _ResponseModel(BaseModel):
+    """Base for models parsed from merchant responses.
+
+    These are never mutated after parsing, so they are frozen.
+    """
+
+    model_config = ConfigDict(frozen=True)
 
 
 # ============================================================================
@@ -10,7 +19,7 @@ from pydantic import BaseModel, Field
 # ============================================================================
 
 
-class UCPCapability(BaseModel):
+class UCPCapability(_ResponseModel):
     """A UCP capability declared by a merchant."""
 
     name: str
@@ -20,7 +29,7 @@ class UCPCapability(BaseModel):
     extends: str | None = None
 
 
-class PaymentHandler(BaseModel):
+class PaymentHandler(_ResponseModel):
     """A payment handler supported by a merchant."""
 
     id: str
@@ -30,7 +39,27 @@ class PaymentHandler(BaseModel):
     config: dict[str, Any] = Field(default_factory=dict)
 
 
-class UCPDiscoveryResponse(BaseModel):
+class UCPWire(_ResponseModel):
+    """The ``ucp`` block of a /.well-known/ucp document."""
+
+    version: str = "unknown"
+    capabilities: list[UCPCapability] = Field(default_factory=list)
+
+
+class PaymentWire(_ResponseModel):
+    """The ``payment`` block of a /.well-known/ucp document."""
+
+    handlers: list[PaymentHandler] = Field(default_factory=list)
+
+
+class UCPDiscoveryWire(_ResponseModel):
+    """A /.well-known/ucp document as served by the merchant."""
+
+    ucp: UCPWire = Field(default_factory=UCPWire)
+    payment: PaymentWire = Field(default_factory=PaymentWire)
+
+
+class UCPDiscoveryResponse(_ResponseModel):
     """Response from /.well-known/ucp endpoint."""
 
     ucp_version: str = Field(alias="version")
@@ -43,7 +72,7 @@ class UCPDiscoveryResponse(BaseModel):
 # ============================================================================
 
 
-class LineItem(BaseModel):
+class LineItem(_ResponseModel):
     """An item in a checkout."""
 
     id: str | None = None
@@ -52,14 +81,14 @@ class LineItem(BaseModel):
     totals: list[dict[str, Any]] = Field(default_factory=list)
 
 
-class CheckoutTotals(BaseModel):
+class CheckoutTotals(_ResponseModel):
     """Totals for a checkout."""
 
     type: str
     amount: int
 
 
-class DiscountApplied(BaseModel):
+class DiscountApplied(_ResponseModel):
     """A discount that was applied."""
 
     code: str
@@ -68,14 +97,14 @@ class DiscountApplied(BaseModel):
     automatic: bool = False
 
 
-class OrderInfo(BaseModel):
+class OrderInfo(_ResponseModel):
     """Order information returned after checkout completion."""
 
     id: str | None = None
     permalink_url: str | None = None
 
 
-class CheckoutSession(BaseModel):
+class CheckoutSession(_ResponseModel):
     """A UCP checkout session."""
 
     id: str
@@ -86,29 +115,35 @@ class CheckoutSession(BaseModel):
     discounts: dict[str, Any] = Field(default_factory=dict)
     order: OrderInfo | None = Field(default=None)
 
+    # (totals list it was built from, map); model_copy carries it over, so it
+    # is rebuilt whenever ``totals`` is no longer the same list
+    _totals_by_type: tuple[list[CheckoutTotals], dict[str, int]] | None = PrivateAttr(
+        default=None
+    )
+
+    @property
+    def totals_by_type(self) -> dict[str, int]:
+        """Map each totals type to its amount (first entry wins)."""
+        cached = self._totals_by_type
+        if cached is None or cached[0] is not self.totals:
+            cached = (self.totals, {t.type: t.amount for t in reversed(self.totals)})
+            self._totals_by_type = cached
+        return cached[1]
+
     @property
     def total(self) -> int:
         """Get the total amount."""
-        for t in self.totals:
-            if t.type == "total":
-                return t.amount
-        return 0
+        return self.totals_by_type.get("total", 0)
 
     @property
     def subtotal(self) -> int:
         """Get the subtotal amount."""
-        for t in self.totals:
-            if t.type == "subtotal":
-                return t.amount
-        return 0
+        return self.totals_by_type.get("subtotal", 0)
 
     @property
     def discount_amount(self) -> int:
         """Get the discount amount."""
-        for t in self.totals:
-            if t.type == "discount":
-                return t.amount
-        return 0
+        return self.totals_by_type.get("discount", 0)
 
 
 # ============================================================================
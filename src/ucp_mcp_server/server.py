@@ -1,13 +1,32 @@
 """MCP Server exposing UCP shopping capabilities as tools."""
 
+import importlib.util
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
+import anyio
 from mcp.server.fastmcp import FastMCP
 
-from .ucp_client import UCPClient, UCPClientError
+from .ucp_client import UCPClient, UCPClientError, aclose_shared_client
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Close the shared HTTP client when the server shuts down."""
+    try:
+        yield
+    finally:
+        await aclose_shared_client()
+
 
 # Initialize FastMCP server
-mcp = FastMCP("ucp-shopping")
+mcp = FastMCP("ucp-shopping", lifespan=lifespan)
+
+
+def _totals_dict(data: dict[str, Any]) -> dict[str, int]:
+    """Map each totals type in raw checkout data to its amount (first wins)."""
+    return {t["type"]: t["amount"] for t in reversed(data.get("totals", ()))}
 
 
 @mcp.tool()
@@ -181,17 +200,11 @@ async def ucp_checkout_set_fulfillment(
                 merchant_url=merchant_url,
                 checkout_id=checkout_id,
             )
+            totals = _totals_dict(data)
             return {
                 "checkout_id": data["id"],
                 "status": data["status"],
-                "total": next(
-                    (
-                        t["amount"]
-                        for t in data.get("totals", [])
-                        if t["type"] == "total"
-                    ),
-                    0,
-                ),
+                "total": totals.get("total", 0),
                 "currency": data.get("currency", "USD"),
                 "fulfillment": data.get("fulfillment"),
             }
@@ -243,7 +256,9 @@ async def ucp_checkout_update(
 
 def main():
     """Run the MCP server."""
-    mcp.run(transport="stdio")
+    # Use uvloop's faster event loop when installed (the 'speedups' extra)
+    use_uvloop = importlib.util.find_spec("uvloop") is not None
+    anyio.run(mcp.run_stdio_async, backend_options={"use_uvloop": use_uvloop})
 
 
 if __name__ == "__main__":
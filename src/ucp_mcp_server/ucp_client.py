@@ -1,74 +1,380 @@
 """HTTP client for UCP API calls."""
 
-import uuid
-from typing import Any
-
+import asyncio
+import functools
+import itertools
+import json
+import operator
+import os
+import secrets
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import anyio
 import httpx
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 from .models import (
     CheckoutSession,
+    CheckoutTotals,
+    LineItem,
+    OrderInfo,
     PaymentHandler,
+    PaymentWire,
     UCPCapability,
     UCPDiscoveryResponse,
+    UCPDiscoveryWire,
+    UCPWire,
 )
 
 
 class UCPClientError(Exception):
     """Error from UCP client operations."""
 
-    pass
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        # HTTP status of the merchant response, if the error came from one
+        self.status_code = status_code
+
+
+T = TypeVar("T")
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request body to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(content: bytes) -> Any:
+    """Parse a JSON response body."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Set UCP_VALIDATE_RESPONSES=0 to trust merchant responses and skip
+# Pydantic validation when building response models.
+VALIDATE_RESPONSES = os.environ.get("UCP_VALIDATE_RESPONSES", "1") != "0"
+
+
+def _parse_discovery(content: bytes) -> UCPDiscoveryWire:
+    """Build a UCPDiscoveryWire from a merchant response body."""
+    if VALIDATE_RESPONSES:
+        # Parse and validate in a single pass in pydantic-core
+        return UCPDiscoveryWire.model_validate_json(content)
+
+    data = _loads(content)
+    ucp_data = data.get("ucp", {})
+    payment_data = data.get("payment", {})
+    return UCPDiscoveryWire.model_construct(
+        ucp=UCPWire.model_construct(
+            version=ucp_data.get("version", "unknown"),
+            capabilities=[
+                UCPCapability.model_construct(**cap)
+                for cap in ucp_data.get("capabilities", [])
+            ],
+        ),
+        payment=PaymentWire.model_construct(
+            handlers=[
+                PaymentHandler.model_construct(**h)
+                for h in payment_data.get("handlers", [])
+            ],
+        ),
+    )
+
+
+def _parse_checkout(content: bytes) -> CheckoutSession:
+    """Build a CheckoutSession from a merchant response body."""
+    if VALIDATE_RESPONSES:
+        # Parse and validate in a single pass in pydantic-core
+        return CheckoutSession.model_validate_json(content)
+    return _checkout_from_data(_loads(content))
+
+
+def _parse_checkout_state(content: bytes) -> tuple[dict[str, Any], CheckoutSession]:
+    """Decode a checkout response into its raw state and a CheckoutSession."""
+    data = _loads(content)
+    return data, _checkout_from_data(data)
+
+
+def _checkout_from_data(data: dict[str, Any]) -> CheckoutSession:
+    """Build a CheckoutSession from already-decoded merchant data."""
+    if VALIDATE_RESPONSES:
+        return CheckoutSession.model_validate(data)
+
+    # model_construct does not recurse, so build nested models explicitly
+    order = data.get("order")
+    return CheckoutSession.model_construct(
+        **{
+            **data,
+            "line_items": [
+                LineItem.model_construct(**li) for li in data.get("line_items", [])
+            ],
+            "totals": [
+                CheckoutTotals.model_construct(**t) for t in data.get("totals", [])
+            ],
+            "order": OrderInfo.model_construct(**order) if order else None,
+        }
+    )
+
+
+# Request and idempotency ids: a random per-process prefix plus a counter is
+# unique without drawing fresh randomness for every header
+_ID_PREFIX = secrets.token_hex(8)
+_ID_COUNTER = itertools.count()
+
+
+def _new_id() -> str:
+    """Generate a unique id for request-id / idempotency-key headers."""
+    return f"{_ID_PREFIX}-{next(_ID_COUNTER):x}"
+
+
+_ITEM_FIELDS = operator.itemgetter("id", "quantity")
+
+
+def _line_item(item: dict[str, Any]) -> dict[str, Any]:
+    """Build a checkout line item from a tool-level item dict."""
+    item_id, quantity = _ITEM_FIELDS(item)
+    return {
+        "item": {"id": item_id, "title": item.get("title", "")},
+        "quantity": quantity,
+    }
+
+
+_UCP_AGENT = 'profile="https://ucp-mcp-server.example/profile"'
+
+# Static request headers; per-request ids are merged in at call time
+_GET_HEADERS = {
+    "UCP-Agent": _UCP_AGENT,
+    "request-signature": "test",
+}
+_BASE_HEADERS = {
+    "Content-Type": "application/json",
+    **_GET_HEADERS,
+}
+
+# Static parts of the complete_checkout payload; only ever serialized
+_BILLING_ADDRESS = {
+    "street_address": "123 Main St",
+    "address_locality": "Anytown",
+    "address_region": "CA",
+    "address_country": "US",
+    "postal_code": "12345",
+}
+_RISK_SIGNALS = {
+    "ip": "127.0.0.1",
+    "browser": "ucp-mcp-server",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _endpoints(merchant_url: str) -> dict[str, str]:
+    """Get the base URL and UCP endpoint URLs for a merchant."""
+    base = merchant_url.rstrip("/")
+    return {
+        "base": base,
+        "discover": f"{base}/.well-known/ucp",
+        "checkout": f"{base}/checkout-sessions",
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _checkout_urls(merchant_url: str, checkout_id: str) -> tuple[str, str]:
+    """Get the session URL (GET/PUT) and complete URL for a checkout."""
+    session_url = f"{_endpoints(merchant_url)['checkout']}/{checkout_id}"
+    return session_url, f"{session_url}/complete"
+
+
+# Seconds a checkout state returned by the merchant may be reused by
+# update_checkout instead of fetching it again
+CHECKOUT_CACHE_TTL = 5.0
+
+# Most checkout states kept at once, however recent
+CHECKOUT_CACHE_MAXSIZE = 1024
+
+# Kept in write order (oldest first), so expired entries are at the front.
+# States are stored serialized so callers can't mutate a cached copy.
+_CHECKOUT_CACHE: dict[tuple[str, str], tuple[float, bytes]] = {}
+
+
+def _cache_checkout(merchant_url: str, checkout_id: str, data: dict[str, Any]) -> None:
+    """Remember the latest known state of a checkout session.
+
+    Expired entries, and the oldest ones beyond CHECKOUT_CACHE_MAXSIZE, are
+    evicted here so abandoned checkouts don't accumulate.
+    """
+    key = (_endpoints(merchant_url)["base"], checkout_id)
+    now = time.monotonic()
+    # Re-insert so the entry moves to the back of the write order
+    _CHECKOUT_CACHE.pop(key, None)
+    _CHECKOUT_CACHE[key] = (now, _dumps(data))
+
+    while (oldest := next(iter(_CHECKOUT_CACHE))) != key:
+        cached_at, _ = _CHECKOUT_CACHE[oldest]
+        if (
+            len(_CHECKOUT_CACHE) <= CHECKOUT_CACHE_MAXSIZE
+            and now - cached_at <= CHECKOUT_CACHE_TTL
+        ):
+            break
+        del _CHECKOUT_CACHE[oldest]
+
+
+def _cached_checkout(merchant_url: str, checkout_id: str) -> dict[str, Any] | None:
+    """Get a recently cached checkout state, or None if missing or stale.
+
+    Each call returns a fresh copy of the state.
+    """
+    key = (_endpoints(merchant_url)["base"], checkout_id)
+    entry = _CHECKOUT_CACHE.get(key)
+    if entry is None:
+        return None
+    cached_at, content = entry
+    if time.monotonic() - cached_at > CHECKOUT_CACHE_TTL:
+        del _CHECKOUT_CACHE[key]
+        return None
+    return _loads(content)
+
+
+def _invalidate_checkout(merchant_url: str, checkout_id: str) -> None:
+    """Forget any cached state for a checkout session."""
+    _CHECKOUT_CACHE.pop((_endpoints(merchant_url)["base"], checkout_id), None)
+
+
+def _status_error(response: httpx.Response) -> UCPClientError:
+    """Build the error for a non-2xx merchant response."""
+    return UCPClientError(
+        f"HTTP error from merchant: {response.status_code} - {response.text}",
+        status_code=response.status_code,
+    )
+
+
+DEFAULT_TIMEOUT = 30.0
+
+# Response bodies larger than this are parsed in a worker thread so the
+# event loop keeps serving other tool calls meanwhile
+THREAD_PARSE_THRESHOLD = 64 * 1024
+
+# Connection pool settings for the shared HTTP client
+_LIMITS = httpx.Limits(
+    max_keepalive_connections=100,
+    max_connections=200,
+    keepalive_expiry=60,
+)
+
+# One shared client per event loop. Entries go away with their loop, so a
+# client left behind by a finished loop doesn't stay referenced here.
+_SHARED_CLIENTS: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+
+
+def _shared_client() -> httpx.AsyncClient:
+    """Get the HTTP client shared by the running event loop, creating it on first use.
+
+    Clients are bound to the loop they were created on, so each loop gets its
+    own (e.g. one per test case). A client is never replaced while its loop
+    is alive; it is closed by ``aclose_shared_client`` or, once the loop is
+    gone, released together with its pooled connections.
+    """
+    loop = asyncio.get_running_loop()
+    client = _SHARED_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        # Retry once on connection failures (e.g. a stale keep-alive socket)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=_LIMITS, retries=1)
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, transport=transport)
+        _SHARED_CLIENTS[loop] = client
+    return client
+
+
+async def aclose_shared_client() -> None:
+    """Close the running loop's shared HTTP client. Call on server shutdown."""
+    client = _SHARED_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
 
 
 class UCPClient:
-    """Async HTTP client for UCP merchant APIs."""
+    """Async HTTP client for UCP merchant APIs.
+
+    Instances borrow a process-wide ``httpx.AsyncClient`` so connections
+    (and TLS sessions) are reused across tool calls. Exiting the context
+    manager does not close the shared client; use ``aclose_shared_client``.
+
+    The shared client speaks HTTP/2, so concurrent requests to the same
+    merchant are multiplexed over one connection. Merchants that only
+    support HTTP/1.1 are negotiated down automatically via ALPN.
+    """
 
-    def __init__(self, timeout: float = 30.0):
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
         self.timeout = timeout
         self._client: httpx.AsyncClient | None = None
 
     async def __aenter__(self) -> "UCPClient":
-        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._client = _shared_client()
         return self
 
     async def __aexit__(self, *args) -> None:
-        if self._client:
-            await self._client.aclose()
-            self._client = None
+        self._client = None
 
     def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
             raise UCPClientError("Client not initialized. Use async context manager.")
         return self._client
 
-    async def discover(self, merchant_url: str) -> UCPDiscoveryResponse:
-        """Discover merchant UCP capabilities."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/.well-known/ucp"
+    def invalidate(self, merchant_url: str, checkout_id: str) -> None:
+        """Forget remembered state for a checkout so the next update re-fetches it.
 
+        Use this if the checkout may have been changed outside this client.
+        """
+        _invalidate_checkout(merchant_url, checkout_id)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        action: str,
+        parse: Callable[[bytes], T],
+        **kwargs: Any,
+    ) -> T:
+        """Send a request and parse the response body.
+
+        All failures (connection, HTTP status, malformed body) are raised as
+        UCPClientError; ``action`` describes the operation for the message.
+        """
+        client = self._get_client()
         try:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+            if not response.is_success:
+                raise _status_error(response)
+            content = response.content
+            if len(content) > THREAD_PARSE_THRESHOLD:
+                return await anyio.to_thread.run_sync(parse, content)
+            return parse(content)
+        except UCPClientError:
+            raise
         except httpx.ConnectError as e:
             raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(f"HTTP error from merchant: {e}")
         except Exception as e:
-            raise UCPClientError(f"Error discovering merchant: {e}")
+            raise UCPClientError(f"Error {action}: {e}")
 
-        # Parse the UCP response
-        ucp_data = data.get("ucp", {})
-        payment_data = data.get("payment", {})
-
-        capabilities = [
-            UCPCapability(**cap) for cap in ucp_data.get("capabilities", [])
-        ]
-        handlers = [PaymentHandler(**h) for h in payment_data.get("handlers", [])]
-
-        return UCPDiscoveryResponse(
-            version=ucp_data.get("version", "unknown"),
-            capabilities=capabilities,
-            payment_handlers=handlers,
+    async def discover(self, merchant_url: str) -> UCPDiscoveryResponse:
+        """Discover merchant UCP capabilities."""
+        url = _endpoints(merchant_url)["discover"]
+        wire = await self._request("GET", url, "discovering merchant", _parse_discovery)
+
+        # Capabilities and handlers are already built; skip re-validation
+        return UCPDiscoveryResponse.model_construct(
+            version=wire.ucp.version,
+            capabilities=wire.ucp.capabilities,
+            payment_handlers=wire.payment.handlers,
         )
 
     async def create_checkout(
@@ -80,17 +386,9 @@ class UCPClient:
         payment_handlers: list[dict] | None = None,
     ) -> CheckoutSession:
         """Create a new checkout session."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/checkout-sessions"
+        url = _endpoints(merchant_url)["checkout"]
 
-        # Build line items
-        line_items = [
-            {
-                "item": {"id": item["id"], "title": item.get("title", "")},
-                "quantity": item["quantity"],
-            }
-            for item in items
-        ]
+        line_items = list(map(_line_item, items))
 
         payload = {
             "line_items": line_items,
@@ -105,28 +403,21 @@ class UCPClient:
             },
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "idempotency-key": str(uuid.uuid4()),
-            "request-id": str(uuid.uuid4()),
+        headers = _BASE_HEADERS | {
+            "idempotency-key": _new_id(),
+            "request-id": _new_id(),
         }
 
-        try:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-        except httpx.ConnectError as e:
-            raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(
-                f"HTTP error from merchant: {e.response.status_code} - {e.response.text}"
-            )
-        except Exception as e:
-            raise UCPClientError(f"Error creating checkout: {e}")
-
-        return CheckoutSession(**data)
+        data, session = await self._request(
+            "POST",
+            url,
+            "creating checkout",
+            _parse_checkout_state,
+            content=_dumps(payload),
+            headers=headers,
+        )
+        _cache_checkout(merchant_url, session.id, data)
+        return session
 
     async def complete_checkout(
         self,
@@ -138,12 +429,12 @@ class UCPClient:
         card_last_digits: str = "4242",
     ) -> CheckoutSession:
         """Complete a checkout session by submitting payment."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/checkout-sessions/{checkout_id}/complete"
+        _invalidate_checkout(merchant_url, checkout_id)
+        _, url = _checkout_urls(merchant_url, checkout_id)
 
         payload = {
             "payment_data": {
-                "id": f"instr_{uuid.uuid4().hex[:8]}",
+                "id": f"instr_{secrets.token_hex(4)}",
                 "handler_id": payment_handler_id,
                 "handler_name": payment_handler_id,
                 "type": "card",
@@ -153,42 +444,24 @@ class UCPClient:
                     "type": "token",
                     "token": card_token,
                 },
-                "billing_address": {
-                    "street_address": "123 Main St",
-                    "address_locality": "Anytown",
-                    "address_region": "CA",
-                    "address_country": "US",
-                    "postal_code": "12345",
-                },
-            },
-            "risk_signals": {
-                "ip": "127.0.0.1",
-                "browser": "ucp-mcp-server",
+                "billing_address": _BILLING_ADDRESS,
             },
+            "risk_signals": _RISK_SIGNALS,
         }
 
-        headers = {
-            "Content-Type": "application/json",
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "idempotency-key": str(uuid.uuid4()),
-            "request-id": str(uuid.uuid4()),
+        headers = _BASE_HEADERS | {
+            "idempotency-key": _new_id(),
+            "request-id": _new_id(),
         }
 
-        try:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-        except httpx.ConnectError as e:
-            raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(
-                f"HTTP error from merchant: {e.response.status_code} - {e.response.text}"
-            )
-        except Exception as e:
-            raise UCPClientError(f"Error completing checkout: {e}")
-
-        return CheckoutSession(**data)
+        return await self._request(
+            "POST",
+            url,
+            "completing checkout",
+            _parse_checkout,
+            content=_dumps(payload),
+            headers=headers,
+        )
 
     async def get_checkout(
         self,
@@ -196,25 +469,13 @@ class UCPClient:
         checkout_id: str,
     ) -> dict[str, Any]:
         """Fetch current checkout state."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/checkout-sessions/{checkout_id}"
-        headers = {
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "request-id": str(uuid.uuid4()),
-        }
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.ConnectError as e:
-            raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(
-                f"HTTP error from merchant: {e.response.status_code} - {e.response.text}"
-            )
-        except Exception as e:
-            raise UCPClientError(f"Error fetching checkout: {e}")
+        url, _ = _checkout_urls(merchant_url, checkout_id)
+        headers = _GET_HEADERS | {"request-id": _new_id()}
+        data = await self._request(
+            "GET", url, "fetching checkout", _loads, headers=headers
+        )
+        _cache_checkout(merchant_url, checkout_id, data)
+        return data
 
     async def raw_update_checkout(
         self,
@@ -223,99 +484,105 @@ class UCPClient:
         payload: dict[str, Any],
     ) -> dict[str, Any]:
         """Send a raw update payload to a checkout session."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/checkout-sessions/{checkout_id}"
-        headers = {
-            "Content-Type": "application/json",
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "idempotency-key": str(uuid.uuid4()),
-            "request-id": str(uuid.uuid4()),
+        url, _ = _checkout_urls(merchant_url, checkout_id)
+        headers = _BASE_HEADERS | {
+            "idempotency-key": _new_id(),
+            "request-id": _new_id(),
         }
-        try:
-            response = await client.put(url, json=payload, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.ConnectError as e:
-            raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(
-                f"HTTP error from merchant: {e.response.status_code} - {e.response.text}"
-            )
-        except Exception as e:
-            raise UCPClientError(f"Error updating checkout: {e}")
+        data = await self._request(
+            "PUT",
+            url,
+            "updating checkout",
+            _loads,
+            content=_dumps(payload),
+            headers=headers,
+        )
+        _cache_checkout(merchant_url, checkout_id, data)
+        return data
 
     async def setup_fulfillment(
         self,
         merchant_url: str,
         checkout_id: str,
+        current: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        """Set up fulfillment (shipping) for a checkout. Auto-selects first address and option."""
-        # Get current checkout state
-        current = await self.get_checkout(merchant_url, checkout_id)
-
-        base_payload = {
+        """Set up fulfillment (shipping) for a checkout. Auto-selects first address and option.
+
+        Pass ``current`` (the latest checkout state) to skip the initial fetch.
+        """
+        # Get current checkout state, unless the caller or a recent update has it
+        if current is None:
+            current = _cached_checkout(merchant_url, checkout_id)
+        if current is None:
+            current = await self.get_checkout(merchant_url, checkout_id)
+        _invalidate_checkout(merchant_url, checkout_id)
+
+        # One payload is reused across the steps; each PUT serializes it
+        # before it is updated for the next step.
+        payload = {
             "id": checkout_id,
             "line_items": current["line_items"],
             "currency": current["currency"],
             "payment": current["payment"],
+            "fulfillment": {"methods": [{"type": "shipping"}]},
         }
 
         # Step 1: Trigger fulfillment generation
-        payload = {**base_payload, "fulfillment": {"methods": [{"type": "shipping"}]}}
         data = await self.raw_update_checkout(merchant_url, checkout_id, payload)
 
         # Step 2: Select first destination
-        fulfillment = data.get("fulfillment", {})
-        methods = fulfillment.get("methods", [])
+        methods = (data.get("fulfillment") or {}).get("methods")
         if not methods:
             return data
 
-        method = methods[0]
-        destinations = method.get("destinations", [])
+        destinations = methods[0].get("destinations")
         if not destinations:
             return data
 
         dest_id = destinations[0]["id"]
-        payload = {
-            **base_payload,
-            "line_items": data["line_items"],
-            "payment": data["payment"],
-            "fulfillment": {
-                "methods": [{"type": "shipping", "selected_destination_id": dest_id}]
-            },
+        payload["line_items"] = data["line_items"]
+        payload["payment"] = data["payment"]
+        payload["fulfillment"] = {
+            "methods": [{"type": "shipping", "selected_destination_id": dest_id}]
         }
         data = await self.raw_update_checkout(merchant_url, checkout_id, payload)
 
         # Step 3: Select first shipping option
-        fulfillment = data.get("fulfillment", {})
-        methods = fulfillment.get("methods", [])
+        methods = (data.get("fulfillment") or {}).get("methods")
         if not methods:
             return data
 
-        method = methods[0]
-        groups = method.get("groups", [])
-        if not groups or not groups[0].get("options"):
+        groups = methods[0].get("groups")
+        options = groups[0].get("options") if groups else None
+        if not options:
             return data
 
-        option_id = groups[0]["options"][0]["id"]
-        payload = {
-            **base_payload,
-            "line_items": data["line_items"],
-            "payment": data["payment"],
-            "fulfillment": {
-                "methods": [
-                    {
-                        "type": "shipping",
-                        "selected_destination_id": dest_id,
-                        "groups": [{"selected_option_id": option_id}],
-                    }
-                ]
-            },
+        option_id = options[0]["id"]
+        payload["line_items"] = data["line_items"]
+        payload["payment"] = data["payment"]
+        payload["fulfillment"] = {
+            "methods": [
+                {
+                    "type": "shipping",
+                    "selected_destination_id": dest_id,
+                    "groups": [{"selected_option_id": option_id}],
+                }
+            ]
         }
         data = await self.raw_update_checkout(merchant_url, checkout_id, payload)
         return data
 
+    async def _fetch_current_state(self, url: str) -> dict[str, Any]:
+        """Fetch checkout state for an update, or {} if it can't be fetched."""
+        headers = _GET_HEADERS | {"request-id": _new_id()}
+        try:
+            return await self._request(
+                "GET", url, "fetching checkout", _loads, headers=headers
+            )
+        except UCPClientError:
+            # If we can't fetch, build a minimal payload
+            return {}
+
     async def update_checkout(
         self,
         merchant_url: str,
@@ -324,30 +591,48 @@ class UCPClient:
         line_items: list[dict] | None = None,
     ) -> CheckoutSession:
         """Update an existing checkout session."""
-        client = self._get_client()
-        url = f"{merchant_url.rstrip('/')}/checkout-sessions/{checkout_id}"
+        url, _ = _checkout_urls(merchant_url, checkout_id)
 
-        # First, fetch the current checkout state so we can send required fields
-        get_headers = {
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "request-id": str(uuid.uuid4()),
-        }
+        # Reuse recently seen state, otherwise fetch the current checkout
+        # state so we can send required fields
+        current = _cached_checkout(merchant_url, checkout_id)
+        from_cache = current is not None
+        if current is None:
+            current = await self._fetch_current_state(url)
+
+        # Drop the cached state; it is only restored if the update succeeds
+        _invalidate_checkout(merchant_url, checkout_id)
         try:
-            get_response = await client.get(url, headers=get_headers)
-            get_response.raise_for_status()
-            current = get_response.json()
-        except Exception:
-            # If we can't fetch, build a minimal payload
-            current = {}
+            data, session = await self._put_update(
+                url, checkout_id, current, discount_codes, line_items
+            )
+        except UCPClientError as e:
+            if not (from_cache and e.status_code in (409, 412)):
+                raise
+            # The cached state was out of date; retry with fresh state
+            current = await self._fetch_current_state(url)
+            data, session = await self._put_update(
+                url, checkout_id, current, discount_codes, line_items
+            )
+
+        _cache_checkout(merchant_url, checkout_id, data)
+        return session
 
+    async def _put_update(
+        self,
+        url: str,
+        checkout_id: str,
+        current: dict[str, Any],
+        discount_codes: list[str] | None,
+        line_items: list[dict] | None,
+    ) -> tuple[dict[str, Any], CheckoutSession]:
+        """Send an update built on top of the given checkout state."""
         payload: dict[str, Any] = {"id": checkout_id}
 
         # Include required fields from current checkout state
-        if current.get("line_items"):
-            payload["line_items"] = current["line_items"]
-        if line_items:
-            payload["line_items"] = line_items
+        items = line_items or current.get("line_items")
+        if items:
+            payload["line_items"] = items
 
         payload["currency"] = current.get("currency", "USD")
         payload["payment"] = current.get("payment", {"instruments": [], "handlers": []})
@@ -355,25 +640,15 @@ class UCPClient:
         if discount_codes:
             payload["discounts"] = {"codes": discount_codes}
 
-        headers = {
-            "Content-Type": "application/json",
-            "UCP-Agent": 'profile="https://ucp-mcp-server.example/profile"',
-            "request-signature": "test",
-            "idempotency-key": str(uuid.uuid4()),
-            "request-id": str(uuid.uuid4()),
+        headers = _BASE_HEADERS | {
+            "idempotency-key": _new_id(),
+            "request-id": _new_id(),
         }
-
-        try:
-            response = await client.put(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-        except httpx.ConnectError as e:
-            raise UCPClientError(f"Could not connect to merchant: {e}")
-        except httpx.HTTPStatusError as e:
-            raise UCPClientError(
-                f"HTTP error from merchant: {e.response.status_code} - {e.response.text}"
-            )
-        except Exception as e:
-            raise UCPClientError(f"Error updating checkout: {e}")
-
-        return CheckoutSession(**data)
+        return await self._request(
+            "PUT",
+            url,
+            "updating checkout",
+            _parse_checkout_state,
+            content=_dumps(payload),
+            headers=headers,
+        )
@@ -1,8 +1,21 @@
 """Pytest fixtures for UCP MCP Server tests."""
 
+import contextlib
+import functools
+import json
+import os
+import re
+from typing import Any
+
+import httpx
 import pytest
 import respx
 from httpx import Response
+from starlette.applications import Starlette
+from starlette.responses import Response as StarletteResponse
+from starlette.routing import Route
+
+from ucp_mcp_server import ucp_client
 
 
 def pytest_addoption(parser):
@@ -13,12 +26,53 @@ def pytest_addoption(parser):
         default=False,
         help="Run integration tests against live UCP server",
     )
+    parser.addoption(
+        "--cache-integration",
+        action="store_true",
+        default=False,
+        help="Reuse identical checkouts across integration tests",
+    )
+
+
+def _integration_server_url() -> str:
+    """Get the integration server URL from environment or default."""
+    return os.environ.get("UCP_TEST_SERVER", "http://localhost:8182")
+
+
+@functools.cache
+def _probe_server(url: str) -> tuple[str | None, dict[str, Any] | None]:
+    """Probe the integration server once.
+
+    Returns (skip reason, discovery document); the reason is None and the
+    document is the parsed /.well-known/ucp body when the server is up.
+    """
+    try:
+        response = httpx.get(
+            f"{url}/.well-known/ucp", timeout=httpx.Timeout(2.0, connect=1.0)
+        )
+    except httpx.HTTPError as e:
+        return f"Integration server not available at {url}: {e}", None
+    if response.status_code == 200:
+        try:
+            return None, response.json()
+        except ValueError:
+            pass
+    return f"Integration server not responding correctly at {url}", None
 
 
 def pytest_collection_modifyitems(config, items):
-    """Skip integration tests unless --run-integration is passed."""
+    """Skip integration tests unless --run-integration is passed.
+
+    With --run-integration, the live server is probed once here and every
+    integration test is skipped up front if it is unavailable.
+    """
     if config.getoption("--run-integration"):
-        # Run integration tests
+        integration = [item for item in items if "integration" in item.keywords]
+        reason = _probe_server(_integration_server_url())[0] if integration else None
+        if reason:
+            skip_unavailable = pytest.mark.skip(reason=reason)
+            for item in integration:
+                item.add_marker(skip_unavailable)
         return
 
     skip_integration = pytest.mark.skip(reason="Need --run-integration option to run")
@@ -219,46 +273,200 @@ SAMPLE_CHECKOUT_COMPLETED = {
     },
 }
 
+# Serialized once so the mocked routes don't re-encode them for every test
+_JSON_HEADERS = {"content-type": "application/json"}
+_DISCOVERY_BYTES = json.dumps(SAMPLE_DISCOVERY_RESPONSE).encode()
+_CHECKOUT_BYTES = json.dumps(SAMPLE_CHECKOUT_RESPONSE).encode()
+_CHECKOUT_WITH_DISCOUNT_BYTES = json.dumps(SAMPLE_CHECKOUT_WITH_DISCOUNT).encode()
+_CHECKOUT_COMPLETED_BYTES = json.dumps(SAMPLE_CHECKOUT_COMPLETED).encode()
 
-@pytest.fixture
-def mock_ucp_server():
-    """Fixture that mocks UCP server responses."""
-    with respx.mock(assert_all_called=False) as respx_mock:
-        # Discovery endpoint
-        respx_mock.get("http://localhost:8182/.well-known/ucp").mock(
-            return_value=Response(200, json=SAMPLE_DISCOVERY_RESPONSE)
-        )
+_CHECKOUT_RE = re.compile(r"http://localhost:8182/checkout-sessions/[^/]+$")
+_COMPLETE_RE = re.compile(r"http://localhost:8182/checkout-sessions/[^/]+/complete$")
 
-        # Create checkout endpoint
-        respx_mock.post("http://localhost:8182/checkout-sessions").mock(
-            return_value=Response(200, json=SAMPLE_CHECKOUT_RESPONSE)
-        )
 
-        # Get checkout endpoint (for update flow)
-        respx_mock.get(url__regex=r"http://localhost:8182/checkout-sessions/.*").mock(
-            return_value=Response(200, json=SAMPLE_CHECKOUT_RESPONSE)
+def _json_endpoint(body: bytes):
+    """Starlette endpoint that always returns ``body`` as JSON."""
+
+    async def endpoint(request):
+        return StarletteResponse(body, media_type="application/json")
+
+    return endpoint
+
+
+# In-process stub of the UCP server's happy paths, served via ASGITransport
+_UCP_STUB_APP = Starlette(
+    routes=[
+        Route("/.well-known/ucp", _json_endpoint(_DISCOVERY_BYTES)),
+        Route("/checkout-sessions", _json_endpoint(_CHECKOUT_BYTES), methods=["POST"]),
+        Route("/checkout-sessions/{id}", _json_endpoint(_CHECKOUT_BYTES)),
+        Route(
+            "/checkout-sessions/{id}",
+            _json_endpoint(_CHECKOUT_WITH_DISCOUNT_BYTES),
+            methods=["PUT"],
+        ),
+        Route(
+            "/checkout-sessions/{id}/complete",
+            _json_endpoint(_CHECKOUT_COMPLETED_BYTES),
+            methods=["POST"],
+        ),
+    ]
+)
+
+
+@pytest.fixture(scope="session")
+def integration_server_url():
+    """Get the integration server URL from environment or default."""
+    return _integration_server_url()
+
+
+@pytest.fixture(scope="session")
+def probed_server(integration_server_url):
+    """The server's discovery document, as already fetched by the probe."""
+    reason, document = _probe_server(integration_server_url)
+    if reason:
+        pytest.skip(reason)
+    return document
+
+
+@pytest.fixture(scope="session")
+def ucp_router():
+    """Router with the mocked UCP server routes, built once per session."""
+    respx_mock = respx.MockRouter(assert_all_called=False)
+
+    # Discovery endpoint
+    respx_mock.get("http://localhost:8182/.well-known/ucp", name="discover").mock(
+        return_value=Response(200, content=_DISCOVERY_BYTES, headers=_JSON_HEADERS)
+    )
+
+    # Create checkout endpoint
+    respx_mock.post("http://localhost:8182/checkout-sessions", name="create").mock(
+        return_value=Response(200, content=_CHECKOUT_BYTES, headers=_JSON_HEADERS)
+    )
+
+    # Get checkout endpoint (for update flow)
+    respx_mock.get(url__regex=_CHECKOUT_RE, name="get").mock(
+        return_value=Response(200, content=_CHECKOUT_BYTES, headers=_JSON_HEADERS)
+    )
+
+    # Update checkout endpoint
+    respx_mock.put(url__regex=_CHECKOUT_RE, name="update").mock(
+        return_value=Response(
+            200, content=_CHECKOUT_WITH_DISCOUNT_BYTES, headers=_JSON_HEADERS
         )
+    )
 
-        # Update checkout endpoint
-        respx_mock.put(url__regex=r"http://localhost:8182/checkout-sessions/.*").mock(
-            return_value=Response(200, json=SAMPLE_CHECKOUT_WITH_DISCOUNT)
+    # Complete checkout endpoint
+    respx_mock.post(url__regex=_COMPLETE_RE, name="complete").mock(
+        return_value=Response(
+            200, content=_CHECKOUT_COMPLETED_BYTES, headers=_JSON_HEADERS
         )
+    )
+
+    return respx_mock
+
+
+@pytest.fixture(autouse=True)
+def empty_checkout_cache(monkeypatch):
+    """Start every test with no remembered checkout state."""
+    monkeypatch.setattr(ucp_client, "_CHECKOUT_CACHE", {})
+
 
-        # Complete checkout endpoint
-        respx_mock.post(
-            url__regex=r"http://localhost:8182/checkout-sessions/.*/complete"
-        ).mock(return_value=Response(200, json=SAMPLE_CHECKOUT_COMPLETED))
+@pytest.fixture
+def mock_ucp_server(ucp_router):
+    """Fixture that mocks UCP server responses.
+
+    Routes overridden inside a test and recorded calls are rolled back
+    when the test finishes.
+    """
+    with ucp_router:
+        yield ucp_router
 
+
+@pytest.fixture
+def respx_mock():
+    """Per-test respx router; tests register only the routes they need."""
+    with respx.mock(assert_all_called=False) as respx_mock:
         yield respx_mock
 
 
+# Clients standing in for the shared client, most recent last
+_CLIENT_OVERRIDES: list[httpx.AsyncClient] = []
+
+
+@contextlib.contextmanager
+def _override_shared_client(client: httpx.AsyncClient):
+    """Route every UCPClient through ``client`` until the block exits.
+
+    The single place tests replace ``ucp_client._shared_client``. Overrides
+    nest, and leaving one (in any order) restores the most recent override
+    still active, or the real factory once none are.
+    """
+    if not _CLIENT_OVERRIDES:
+        shared_client = ucp_client._shared_client
+        ucp_client._shared_client = lambda: _CLIENT_OVERRIDES[-1]
+    _CLIENT_OVERRIDES.append(client)
+    try:
+        yield
+    finally:
+        _CLIENT_OVERRIDES.remove(client)
+        if not _CLIENT_OVERRIDES:
+            ucp_client._shared_client = shared_client
+
+
+@pytest.fixture(scope="session")
+def ucp_stub_server():
+    """Async context manager that serves merchant requests in-process.
+
+    Routes the shared client to a stub Starlette app with the sample
+    responses. Cheaper per request than respx and, unlike a monkeypatch,
+    usable from class- and module-scoped fixtures:
+    ``async with ucp_stub_server(): ...``.
+    """
+
+    @contextlib.asynccontextmanager
+    async def serve():
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=_UCP_STUB_APP))
+        try:
+            with _override_shared_client(client):
+                yield
+        finally:
+            await client.aclose()
+
+    return serve
+
+
 @pytest.fixture
+async def stub_transport():
+    """Factory that makes every merchant request return one canned response.
+
+    Skips respx routing for tests that only need a static reply, e.g.
+    ``stub_transport(404, text="Not Found")``. The clients it creates are
+    closed when the test finishes.
+    """
+    clients: list[httpx.AsyncClient] = []
+
+    with contextlib.ExitStack() as overrides:
+
+        def install(status_code: int, **kwargs) -> httpx.MockTransport:
+            transport = httpx.MockTransport(
+                lambda request: Response(status_code, **kwargs)
+            )
+            client = httpx.AsyncClient(transport=transport)
+            clients.append(client)
+            overrides.enter_context(_override_shared_client(client))
+            return transport
+
+        yield install
+
+    for client in clients:
+        await client.aclose()
+
+
+@pytest.fixture(scope="class")
 def mock_invalid_server():
-    """Fixture that simulates connection failures."""
+    """Fixture that simulates connection failures on every merchant endpoint."""
     with respx.mock(assert_all_called=False) as respx_mock:
-        import httpx
-
-        respx_mock.get("http://invalid.example/.well-known/ucp").mock(
+        respx_mock.route(host="invalid.example").mock(
             side_effect=httpx.ConnectError("Connection refused")
         )
 
@@ -6,9 +6,17 @@ These tests define our goals for checkout tools:
 - Goal 3: Agent gets clear pricing information
 """
 
+import json
+
 import pytest
+from httpx import Response
 
-from ucp_mcp_server.server import ucp_checkout_create, ucp_checkout_update
+from ucp_mcp_server.models import CheckoutSession, CheckoutTotals
+from ucp_mcp_server.server import (
+    ucp_checkout_create,
+    ucp_checkout_set_fulfillment,
+    ucp_checkout_update,
+)
 
 
 class TestCheckoutCreate:
@@ -173,3 +181,96 @@ class TestCheckoutUpdate:
         )
 
         assert result["checkout_id"] == checkout["checkout_id"]
+
+
+class TestCheckoutSessionTotals:
+    """Tests for the totals helpers on CheckoutSession."""
+
+    def test_totals_follow_model_copy(self):
+        """Goal: Copies with new totals report the new amounts."""
+        session = CheckoutSession.model_validate(
+            {
+                "id": "totals-checkout",
+                "status": "ready_for_complete",
+                "totals": [{"type": "total", "amount": 3500}],
+            }
+        )
+        assert session.total == 3500
+
+        updated = session.model_copy(
+            update={"totals": [CheckoutTotals(type="total", amount=3150)]}
+        )
+
+        assert updated.total == 3150
+
+    def test_totals_map_built_once(self):
+        """Goal: total, subtotal and discount share one totals lookup."""
+        session = CheckoutSession.model_validate(
+            {
+                "id": "totals-checkout",
+                "status": "ready_for_complete",
+                "totals": [
+                    {"type": "subtotal", "amount": 3500},
+                    {"type": "discount", "amount": 350},
+                    {"type": "total", "amount": 3150},
+                ],
+            }
+        )
+
+        assert session.totals_by_type is session.totals_by_type
+        assert (session.subtotal, session.discount_amount, session.total) == (
+            3500,
+            350,
+            3150,
+        )
+
+
+class TestCheckoutSetFulfillment:
+    """Tests for the ucp_checkout_set_fulfillment MCP tool."""
+
+    @pytest.mark.asyncio
+    async def test_set_fulfillment_returns_total(self, mock_ucp_server):
+        """Goal: Agent sees the total after fulfillment is set up."""
+        result = await ucp_checkout_set_fulfillment(
+            merchant_url="http://localhost:8182",
+            checkout_id="cb9c0fc5-3e81-427c-ae54-83578294daf3",
+        )
+
+        assert result["checkout_id"] == "cb9c0fc5-3e81-427c-ae54-83578294daf3"
+        assert result["total"] == 3150
+        assert result["currency"] == "USD"
+
+    @pytest.mark.asyncio
+    async def test_set_fulfillment_selects_first_options(self, mock_ucp_server):
+        """Goal: The first destination and shipping option are selected."""
+        state = {
+            "id": "fulfillment-steps-checkout",
+            "status": "ready_for_complete",
+            "line_items": [],
+            "currency": "USD",
+            "payment": {"handlers": [], "instruments": []},
+            "totals": [{"type": "total", "amount": 4000}],
+        }
+        method = {
+            "type": "shipping",
+            "destinations": [{"id": "dest_1"}, {"id": "dest_2"}],
+            "groups": [{"options": [{"id": "express"}, {"id": "standard"}]}],
+        }
+        put = mock_ucp_server["update"]
+        put.side_effect = [
+            Response(200, json={**state, "fulfillment": {"methods": [method]}})
+        ] * 3
+
+        result = await ucp_checkout_set_fulfillment(
+            merchant_url="http://localhost:8182",
+            checkout_id="fulfillment-steps-checkout",
+        )
+
+        assert result["total"] == 4000
+        assert put.call_count == 3
+        selected = json.loads(put.calls.last.request.content)
+        assert selected["fulfillment"]["methods"][0] == {
+            "type": "shipping",
+            "selected_destination_id": "dest_1",
+            "groups": [{"selected_option_id": "express"}],
+        }
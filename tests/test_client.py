@@ -0,0 +1,407 @@
+"""Tests for UCPClient internals.
+
+These tests define our goals for the HTTP client:
+- Goal 1: Connections are reused across tool calls
+- Goal 2: Trusted responses can skip validation without changing results
+- Goal 3: Back-to-back updates don't re-fetch checkout state, and the
+  remembered state stays bounded
+- Goal 4: Every request carries a unique id
+- Goal 5: JSON handling works with or without orjson
+- Goal 6: Large responses are parsed without blocking the event loop
+"""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+from httpx import Response
+
+from ucp_mcp_server import ucp_client
+from ucp_mcp_server.server import (
+    ucp_checkout_complete,
+    ucp_checkout_create,
+    ucp_checkout_set_fulfillment,
+    ucp_checkout_update,
+    ucp_discover,
+)
+from ucp_mcp_server.ucp_client import UCPClient, aclose_shared_client
+
+# Includes non-ASCII text, which orjson writes unescaped
+JSON_PAYLOAD = {"line_items": [{"item": {"id": "roses", "title": "Rosé"}}], "n": 1}
+
+
+class TestSharedClient:
+    """Tests for the process-wide HTTP client."""
+
+    @pytest.mark.asyncio
+    async def test_clients_share_http_client(self):
+        """Goal: Separate UCPClient contexts reuse one connection pool."""
+        async with UCPClient() as first:
+            http_client = first._get_client()
+        async with UCPClient() as second:
+            assert second._get_client() is http_client
+
+    @pytest.mark.asyncio
+    async def test_exit_does_not_close_shared_client(self):
+        """Goal: Leaving a UCPClient context keeps the pool alive."""
+        async with UCPClient() as client:
+            http_client = client._get_client()
+
+        assert not http_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_aclose_shared_client(self):
+        """Goal: The shared client can be closed on shutdown."""
+        async with UCPClient() as client:
+            http_client = client._get_client()
+
+        await aclose_shared_client()
+
+        assert http_client.is_closed
+        async with UCPClient() as client:
+            assert client._get_client() is not http_client
+
+    def test_finished_loop_releases_client(self):
+        """Goal: A client isn't kept alive after its event loop is gone."""
+
+        async def use_client() -> weakref.ref:
+            async with UCPClient() as client:
+                return weakref.ref(client._get_client())
+
+        first = asyncio.run(use_client())
+        second = asyncio.run(use_client())
+        gc.collect()
+
+        assert first() is None
+        assert second() is None
+
+
+class TestUnvalidatedResponses:
+    """Tests for building response models with UCP_VALIDATE_RESPONSES=0."""
+
+    @pytest.fixture(autouse=True)
+    def skip_validation(self, monkeypatch):
+        monkeypatch.setattr(ucp_client, "VALIDATE_RESPONSES", False)
+
+    @pytest.mark.asyncio
+    async def test_discover_without_validation(self, mock_ucp_server):
+        """Goal: Discovery results are unchanged when validation is skipped."""
+        result = await ucp_discover(merchant_url="http://localhost:8182")
+
+        assert result["ucp_version"] == "2026-01-11"
+        assert len(result["capabilities"]) == 3
+        assert [h["id"] for h in result["payment_handlers"]] == [
+            "shop_pay",
+            "google_pay",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_complete_without_validation(self, mock_ucp_server):
+        """Goal: Nested models (totals, order) are still built."""
+        result = await ucp_checkout_complete(
+            merchant_url="http://localhost:8182",
+            checkout_id="cb9c0fc5-3e81-427c-ae54-83578294daf3",
+        )
+
+        assert result["total"] == 3500
+        assert result["order_id"] == "order-abc-123"
+
+
+class TestLargeResponses:
+    """Tests for parsing large response bodies off the event loop."""
+
+    @pytest.fixture(autouse=True)
+    def parse_in_thread(self, monkeypatch):
+        monkeypatch.setattr(ucp_client, "THREAD_PARSE_THRESHOLD", 0)
+
+    @pytest.mark.asyncio
+    async def test_discover_parsed_in_thread(self, mock_ucp_server):
+        """Goal: Discovery results are unchanged when parsed in a thread."""
+        result = await ucp_discover(merchant_url="http://localhost:8182")
+
+        assert result["ucp_version"] == "2026-01-11"
+        assert len(result["capabilities"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_parse_error_in_thread_returns_error(self, respx_mock):
+        """Goal: Malformed bodies still surface as error dicts."""
+        respx_mock.get("http://localhost:8182/.well-known/ucp").mock(
+            return_value=Response(200, text="not json")
+        )
+
+        result = await ucp_discover(merchant_url="http://localhost:8182")
+
+        assert "discovering merchant" in result["error"]
+
+
+class TestCheckoutStateCache:
+    """Tests for reusing checkout state between updates."""
+
+    @staticmethod
+    def _get_count(mock) -> int:
+        return sum(1 for call in mock.calls if call.request.method == "GET")
+
+    @pytest.mark.asyncio
+    async def test_second_update_skips_get(self, mock_ucp_server):
+        """Goal: Applying a second code reuses the state from the first."""
+        for code in ["10OFF", "FREESHIP"]:
+            result = await ucp_checkout_update(
+                merchant_url="http://localhost:8182",
+                checkout_id="cache-hit-checkout",
+                discount_codes=[code],
+            )
+            assert "error" not in result
+
+        assert self._get_count(mock_ucp_server) == 1
+
+    @pytest.mark.asyncio
+    async def test_update_after_create_skips_get(self, mock_ucp_server):
+        """Goal: Applying a code right after creating a checkout needs no GET."""
+        checkout = await ucp_checkout_create(
+            merchant_url="http://localhost:8182",
+            items=[{"id": "bouquet_roses", "quantity": 1}],
+            buyer_name="Test User",
+            buyer_email="test@example.com",
+        )
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id=checkout["checkout_id"],
+            discount_codes=["10OFF"],
+        )
+
+        assert self._get_count(mock_ucp_server) == 0
+
+    @pytest.mark.asyncio
+    async def test_conflict_retries_with_fresh_state(self, respx_mock):
+        """Goal: A 409 caused by stale cached state is retried after a GET."""
+        url = "http://localhost:8182/checkout-sessions/cache-conflict-checkout"
+        ucp_client._cache_checkout(
+            "http://localhost:8182", "cache-conflict-checkout", {"currency": "EUR"}
+        )
+        respx_mock.get(url).mock(return_value=Response(200, json={"currency": "USD"}))
+        put = respx_mock.put(url)
+        put.side_effect = [
+            Response(409, json={"error": "Conflict"}),
+            Response(200, json={"id": "cache-conflict-checkout", "status": "ready"}),
+        ]
+
+        result = await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-conflict-checkout",
+            discount_codes=["10OFF"],
+        )
+
+        assert "error" not in result
+        assert put.call_count == 2
+        assert b'"USD"' in put.calls.last.request.content
+
+    @pytest.mark.asyncio
+    async def test_caller_mutation_does_not_change_cache(self, respx_mock):
+        """Goal: Editing a cached or returned state doesn't leak into updates."""
+        url = "http://localhost:8182/checkout-sessions/cache-mutation-checkout"
+        state = {"currency": "USD"}
+        ucp_client._cache_checkout(
+            "http://localhost:8182", "cache-mutation-checkout", state
+        )
+        state["currency"] = "EUR"
+        returned = ucp_client._cached_checkout(
+            "http://localhost:8182", "cache-mutation-checkout"
+        )
+        returned["currency"] = "GBP"
+        put = respx_mock.put(url).mock(
+            return_value=Response(200, json={"id": "cache-mutation-checkout"})
+        )
+
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-mutation-checkout",
+            discount_codes=["10OFF"],
+        )
+
+        assert b'"USD"' in put.calls.last.request.content
+
+    @pytest.mark.asyncio
+    async def test_stale_state_is_refetched(self, mock_ucp_server, monkeypatch):
+        """Goal: Cached state expires after the TTL."""
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_TTL", -1.0)
+
+        for code in ["10OFF", "FREESHIP"]:
+            await ucp_checkout_update(
+                merchant_url="http://localhost:8182",
+                checkout_id="cache-stale-checkout",
+                discount_codes=[code],
+            )
+
+        assert self._get_count(mock_ucp_server) == 2
+
+    @pytest.mark.asyncio
+    async def test_fulfillment_after_update_skips_get(self, mock_ucp_server):
+        """Goal: Setting up shipping reuses the state from a discount update."""
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-fulfillment-checkout",
+            discount_codes=["10OFF"],
+        )
+        result = await ucp_checkout_set_fulfillment(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-fulfillment-checkout",
+        )
+
+        assert "error" not in result
+        assert self._get_count(mock_ucp_server) == 1
+
+    @pytest.mark.asyncio
+    async def test_fulfillment_with_current_state_skips_get(self, mock_ucp_server):
+        """Goal: Callers holding the checkout state avoid the fetch entirely."""
+        current = {
+            "id": "cache-current-checkout",
+            "line_items": [{"item": {"id": "bouquet_roses"}, "quantity": 1}],
+            "currency": "USD",
+            "payment": {"handlers": [], "instruments": []},
+        }
+        async with UCPClient() as client:
+            await client.setup_fulfillment(
+                merchant_url="http://localhost:8182",
+                checkout_id="cache-current-checkout",
+                current=current,
+            )
+
+        assert self._get_count(mock_ucp_server) == 0
+
+    @pytest.mark.asyncio
+    async def test_explicit_invalidate_forces_get(self, mock_ucp_server):
+        """Goal: Callers can drop state they suspect is stale."""
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-invalidate-checkout",
+            discount_codes=["10OFF"],
+        )
+        UCPClient().invalidate("http://localhost:8182/", "cache-invalidate-checkout")
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-invalidate-checkout",
+            discount_codes=["FREESHIP"],
+        )
+
+        assert self._get_count(mock_ucp_server) == 2
+
+    @pytest.mark.asyncio
+    async def test_complete_invalidates_state(self, mock_ucp_server):
+        """Goal: Completing a checkout drops its cached state."""
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-complete-checkout",
+            discount_codes=["10OFF"],
+        )
+        await ucp_checkout_complete(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-complete-checkout",
+        )
+        await ucp_checkout_update(
+            merchant_url="http://localhost:8182",
+            checkout_id="cache-complete-checkout",
+            discount_codes=["FREESHIP"],
+        )
+
+        assert self._get_count(mock_ucp_server) == 2
+
+
+class TestCheckoutCacheEviction:
+    """Tests for bounding the checkout state cache."""
+
+    def test_expired_entries_evicted_on_write(self, monkeypatch):
+        """Goal: Checkouts that are never touched again don't linger."""
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_TTL", -1.0)
+        for i in range(100):
+            ucp_client._cache_checkout("http://localhost:8182", f"evict-{i}", {})
+
+        assert list(ucp_client._CHECKOUT_CACHE) == [
+            ("http://localhost:8182", "evict-99")
+        ]
+
+    def test_oldest_entries_evicted_over_maxsize(self, monkeypatch):
+        """Goal: The cache never holds more than CHECKOUT_CACHE_MAXSIZE states."""
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_MAXSIZE", 3)
+        for i in range(5):
+            ucp_client._cache_checkout("http://localhost:8182", f"evict-{i}", {})
+
+        assert [key[1] for key in ucp_client._CHECKOUT_CACHE] == [
+            "evict-2",
+            "evict-3",
+            "evict-4",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_abandoned_checkouts_do_not_accumulate(
+        self, mock_ucp_server, monkeypatch
+    ):
+        """Goal: Creating many checkouts that are never updated stays bounded."""
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_TTL", 0.0)
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_MAXSIZE", 10)
+        create = mock_ucp_server["create"]
+        create.side_effect = [
+            Response(200, json={"id": f"abandoned-{i}", "status": "ready"})
+            for i in range(50)
+        ]
+
+        async with UCPClient() as client:
+            for _ in range(50):
+                await client.create_checkout(
+                    merchant_url="http://localhost:8182",
+                    items=[{"id": "bouquet_roses", "quantity": 1}],
+                    buyer={"name": "Test User", "email": "test@example.com"},
+                )
+
+        assert len(ucp_client._CHECKOUT_CACHE) <= 10
+
+    def test_rewrite_refreshes_entry(self, monkeypatch):
+        """Goal: Re-caching a checkout makes it the newest entry."""
+        monkeypatch.setattr(ucp_client, "CHECKOUT_CACHE_MAXSIZE", 2)
+        for checkout_id in ["evict-a", "evict-b", "evict-a", "evict-c"]:
+            ucp_client._cache_checkout("http://localhost:8182", checkout_id, {})
+
+        assert [key[1] for key in ucp_client._CHECKOUT_CACHE] == [
+            "evict-a",
+            "evict-c",
+        ]
+
+
+class TestRequestIds:
+    """Tests for request-id / idempotency-key generation."""
+
+    def test_ids_are_unique(self):
+        """Goal: Generated ids never repeat within a process."""
+        ids = {ucp_client._new_id() for _ in range(1000)}
+
+        assert len(ids) == 1000
+
+    @pytest.mark.asyncio
+    async def test_create_sends_distinct_ids(self, mock_ucp_server):
+        """Goal: idempotency-key and request-id differ on each request."""
+        async with UCPClient() as client:
+            await client.create_checkout(
+                merchant_url="http://localhost:8182",
+                items=[{"id": "bouquet_roses", "quantity": 1}],
+                buyer={"name": "Test User", "email": "test@example.com"},
+            )
+
+        headers = mock_ucp_server.calls.last.request.headers
+        assert headers["idempotency-key"] != headers["request-id"]
+
+
+class TestJSONCodec:
+    """Tests for request/response JSON (de)serialization."""
+
+    def test_roundtrip(self):
+        """Goal: Encoded payloads decode back to the same data."""
+        assert ucp_client._loads(ucp_client._dumps(JSON_PAYLOAD)) == JSON_PAYLOAD
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        """Goal: Without orjson, the stdlib produces the same compact JSON."""
+        orjson = pytest.importorskip("orjson")
+        encoded = orjson.dumps(JSON_PAYLOAD)
+        monkeypatch.setattr(ucp_client, "orjson", None)
+
+        assert ucp_client._dumps(JSON_PAYLOAD) == encoded
+        assert ucp_client._loads(encoded) == JSON_PAYLOAD
@@ -7,146 +7,74 @@ These tests define our goals for the checkout complete tool:
 """
 
 import pytest
+import pytest_asyncio
 
 from ucp_mcp_server.server import ucp_checkout_complete, ucp_checkout_create
 
+MERCHANT_URL = "http://localhost:8182"
+ROSES_ITEMS = [{"id": "bouquet_roses", "quantity": 1}]
+BUYER = {"buyer_name": "Test User", "buyer_email": "test@example.com"}
 
-class TestCheckoutComplete:
-    """Tests for the ucp_checkout_complete MCP tool."""
 
-    @pytest.mark.asyncio
-    async def test_complete_returns_order_id(self, mock_ucp_server):
-        """Goal: Agent gets an order ID after payment."""
-        # Create checkout first
-        checkout = await ucp_checkout_create(
-            merchant_url="http://localhost:8182",
-            items=[{"id": "bouquet_roses", "quantity": 1}],
-            buyer_name="Test User",
-            buyer_email="test@example.com",
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def created_checkout(ucp_stub_server):
+    """A checkout created once and shared by every test in the class."""
+    async with ucp_stub_server():
+        return await ucp_checkout_create(
+            merchant_url=MERCHANT_URL, items=ROSES_ITEMS, **BUYER
         )
 
-        result = await ucp_checkout_complete(
-            merchant_url="http://localhost:8182",
-            checkout_id=checkout["checkout_id"],
+
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def completed_checkout(ucp_stub_server, created_checkout):
+    """Result of completing ``created_checkout``, shared across the class."""
+    async with ucp_stub_server():
+        return await ucp_checkout_complete(
+            merchant_url=MERCHANT_URL,
+            checkout_id=created_checkout["checkout_id"],
             payment_handler_id="mock_payment_handler",
         )
 
-        assert "order_id" in result
-        assert result["order_id"] != ""
 
-    @pytest.mark.asyncio
-    async def test_complete_returns_status_complete(self, mock_ucp_server):
-        """Goal: Status changes to 'complete' after payment."""
-        checkout = await ucp_checkout_create(
-            merchant_url="http://localhost:8182",
-            items=[{"id": "bouquet_roses", "quantity": 1}],
-            buyer_name="Test User",
-            buyer_email="test@example.com",
-        )
+class TestCheckoutComplete:
+    """Tests for the ucp_checkout_complete MCP tool."""
 
-        result = await ucp_checkout_complete(
-            merchant_url="http://localhost:8182",
-            checkout_id=checkout["checkout_id"],
-            payment_handler_id="mock_payment_handler",
-        )
+    def test_complete_returns_order_id(self, completed_checkout):
+        """Goal: Agent gets an order ID after payment."""
+        assert "order_id" in completed_checkout
+        assert completed_checkout["order_id"] != ""
 
-        assert result["status"] == "complete"
+    def test_complete_returns_status_complete(self, completed_checkout):
+        """Goal: Status changes to 'complete' after payment."""
+        assert completed_checkout["status"] == "complete"
 
-    @pytest.mark.asyncio
-    async def test_complete_returns_order_url(self, mock_ucp_server):
+    def test_complete_returns_order_url(self, completed_checkout):
         """Goal: Agent gets a permalink to track the order."""
-        checkout = await ucp_checkout_create(
-            merchant_url="http://localhost:8182",
-            items=[{"id": "bouquet_roses", "quantity": 1}],
-            buyer_name="Test User",
-            buyer_email="test@example.com",
-        )
-
-        result = await ucp_checkout_complete(
-            merchant_url="http://localhost:8182",
-            checkout_id=checkout["checkout_id"],
-            payment_handler_id="mock_payment_handler",
-        )
+        assert "order_url" in completed_checkout
+        assert completed_checkout["order_url"] is not None
 
-        assert "order_url" in result
-        assert result["order_url"] is not None
-
-    @pytest.mark.asyncio
-    async def test_complete_returns_final_total(self, mock_ucp_server):
+    def test_complete_returns_final_total(self, completed_checkout):
         """Goal: Agent knows the final amount charged."""
-        checkout = await ucp_checkout_create(
-            merchant_url="http://localhost:8182",
-            items=[{"id": "bouquet_roses", "quantity": 1}],
-            buyer_name="Test User",
-            buyer_email="test@example.com",
-        )
+        assert "total" in completed_checkout
+        assert completed_checkout["total"] > 0
 
-        result = await ucp_checkout_complete(
-            merchant_url="http://localhost:8182",
-            checkout_id=checkout["checkout_id"],
-            payment_handler_id="mock_payment_handler",
-        )
-
-        assert "total" in result
-        assert result["total"] > 0
-
-    @pytest.mark.asyncio
-    async def test_complete_preserves_checkout_id(self, mock_ucp_server):
+    def test_complete_preserves_checkout_id(self, created_checkout, completed_checkout):
         """Goal: Checkout ID is consistent."""
-        checkout = await ucp_checkout_create(
-            merchant_url="http://localhost:8182",
-            items=[{"id": "bouquet_roses", "quantity": 1}],
-            buyer_name="Test User",
-            buyer_email="test@example.com",
-        )
-
-        result = await ucp_checkout_complete(
-            merchant_url="http://localhost:8182",
-            checkout_id=checkout["checkout_id"],
-            payment_handler_id="mock_payment_handler",
-        )
-
-        assert result["checkout_id"] == checkout["checkout_id"]
+        assert completed_checkout["checkout_id"] == created_checkout["checkout_id"]
 
 
 class TestCheckoutCompleteErrors:
     """Tests for error handling during checkout completion."""
 
     @pytest.mark.asyncio
-    async def test_complete_invalid_checkout_returns_error(self):
+    async def test_complete_invalid_checkout_returns_error(self, stub_transport):
         """Goal: Invalid checkout ID returns clear error."""
-        import respx
-        from httpx import Response
-
-        with respx.mock(assert_all_called=False) as mock:
-            mock.post(
-                "http://localhost:8182/checkout-sessions/invalid-id/complete"
-            ).mock(return_value=Response(404, json={"error": "Checkout not found"}))
+        stub_transport(404, json={"error": "Checkout not found"})
 
-            result = await ucp_checkout_complete(
-                merchant_url="http://localhost:8182",
-                checkout_id="invalid-id",
-                payment_handler_id="mock_payment_handler",
-            )
-
-            assert "error" in result
+        result = await ucp_checkout_complete(
+            merchant_url=MERCHANT_URL,
+            checkout_id="invalid-id",
+            payment_handler_id="mock_payment_handler",
+        )
 
-    @pytest.mark.asyncio
-    async def test_complete_payment_failure_returns_error(self):
-        """Goal: Payment failures return clear error."""
-        import respx
-        from httpx import Response
-
-        with respx.mock(assert_all_called=False) as mock:
-            mock.post(
-                url__regex=r"http://localhost:8182/checkout-sessions/.*/complete"
-            ).mock(return_value=Response(400, json={"error": "Payment declined"}))
-
-            result = await ucp_checkout_complete(
-                merchant_url="http://localhost:8182",
-                checkout_id="some-checkout-id",
-                payment_handler_id="mock_payment_handler",
-                card_token="fail_token",
-            )
-
-            assert "error" in result
+        assert "error" in result
@@ -30,8 +30,6 @@ uv run server.py \
 ```
 """
 
-import os
-
 import pytest
 
 from ucp_mcp_server.server import (
@@ -43,8 +41,9 @@ from ucp_mcp_server.server import (
 )
 
 
-# Skip integration tests by default
-pytestmark = pytest.mark.integration
+# Skip integration tests by default. All tests share one event loop so the
+# shared HTTP client keeps its connection to the server between tests.
+pytestmark = [pytest.mark.integration, pytest.mark.asyncio(loop_scope="module")]
 
 
 def pytest_configure(config):
@@ -53,35 +52,37 @@ def pytest_configure(config):
     )
 
 
-@pytest.fixture
-def integration_server_url():
-    """Get the integration server URL from environment or default."""
-    return os.environ.get("UCP_TEST_SERVER", "http://localhost:8182")
-
+@pytest.fixture(scope="session")
+def create_checkout(request):
+    """Create checkouts on the live server.
 
-@pytest.fixture
-def skip_if_no_server(integration_server_url):
-    """Skip test if integration server is not available."""
-    import httpx
+    With --cache-integration, creating an identical checkout (same merchant,
+    items and buyer) again in the session reuses the first result.
+    """
+    cache = {} if request.config.getoption("--cache-integration") else None
 
-    try:
-        response = httpx.get(f"{integration_server_url}/.well-known/ucp", timeout=5.0)
-        if response.status_code != 200:
-            pytest.skip(
-                f"Integration server not responding correctly at {integration_server_url}"
-            )
-    except Exception as e:
-        pytest.skip(
-            f"Integration server not available at {integration_server_url}: {e}"
+    async def create(merchant_url, items, buyer_name, buyer_email):
+        key = (merchant_url, repr(items), buyer_name, buyer_email)
+        if cache is not None and key in cache:
+            return cache[key]
+        result = await ucp_checkout_create(
+            merchant_url=merchant_url,
+            items=items,
+            buyer_name=buyer_name,
+            buyer_email=buyer_email,
         )
+        if cache is not None and "error" not in result:
+            cache[key] = result
+        return result
+
+    return create
 
 
 class TestIntegrationDiscovery:
     """Integration tests for discovery against real server."""
 
-    @pytest.mark.asyncio
     async def test_discover_real_flower_shop(
-        self, integration_server_url, skip_if_no_server
+        self, integration_server_url, probed_server
     ):
         """Test discovery against real flower shop server."""
         result = await ucp_discover(merchant_url=integration_server_url)
@@ -100,6 +101,11 @@ class TestIntegrationDiscovery:
         # Should have payment handlers
         assert "payment_handlers" in result
 
+        # Should match the merchant's own discovery document
+        assert capability_names == [
+            c["name"] for c in probed_server["ucp"]["capabilities"]
+        ]
+
         print(f"\nDiscovered capabilities: {capability_names}")
         print(f"Payment handlers: {[h['id'] for h in result['payment_handlers']]}")
 
@@ -107,12 +113,11 @@ class TestIntegrationDiscovery:
 class TestIntegrationCheckout:
     """Integration tests for checkout against real server."""
 
-    @pytest.mark.asyncio
     async def test_create_checkout_with_real_product(
-        self, integration_server_url, skip_if_no_server
+        self, integration_server_url, create_checkout
     ):
         """Test creating checkout with a real product."""
-        result = await ucp_checkout_create(
+        result = await create_checkout(
             merchant_url=integration_server_url,
             items=[{"id": "bouquet_roses", "quantity": 1}],
             buyer_name="Integration Test",
@@ -135,13 +140,12 @@ class TestIntegrationCheckout:
         print(f"\nCreated checkout: {result['checkout_id']}")
         print(f"Total: ${result['total'] / 100:.2f}")
 
-    @pytest.mark.asyncio
     async def test_apply_discount_to_real_checkout(
-        self, integration_server_url, skip_if_no_server
+        self, integration_server_url, create_checkout
     ):
         """Test applying discount to real checkout."""
         # Create checkout first
-        checkout = await ucp_checkout_create(
+        checkout = await create_checkout(
             merchant_url=integration_server_url,
             items=[{"id": "bouquet_roses", "quantity": 1}],
             buyer_name="Integration Test",
@@ -172,10 +176,7 @@ class TestIntegrationCheckout:
 class TestIntegrationFullFlow:
     """Integration test for complete shopping flow."""
 
-    @pytest.mark.asyncio
-    async def test_complete_shopping_flow(
-        self, integration_server_url, skip_if_no_server
-    ):
+    async def test_complete_shopping_flow(self, integration_server_url):
         """Test complete flow: discover -> checkout -> discount."""
         # Step 1: Discover capabilities
         discovery = await ucp_discover(merchant_url=integration_server_url)